@@ -1,16 +1,15 @@
-import lib4relay
 from evdev import InputDevice, ecodes
 
 class BaseController:
     """Base class for controllers."""
 
-    def __init__(self, device_path, device_name, device_mac, **kwargs):
+    def __init__(self, device_path, device_name, device_mac, relay_bank, **kwargs):
         self.device_path = device_path
         self.device_name = device_name
         self.device_mac = device_mac
         self.device = None
         self.is_connected = False
-        self.relay_hardware_states = {1: 0, 2: 0, 3: 0, 4: 0}
+        self.relay_bank = relay_bank
 
         if self.device_path:
             try:
@@ -45,52 +44,50 @@ class BaseController:
         return None
 
     def setup(self, device_config):
-        """Loads configuration and initializes hardware."""
-        print("Setting up controller and relays...")
+        """Loads the controller configuration."""
+        print("Setting up controller...")
         self._load_config(device_config)
-        self._initialize_relays()
         print("Setup complete. Listening for controller input...")
 
     def _load_config(self, device_config):
         """This method should be implemented by subclasses."""
         raise NotImplementedError
 
-    def _initialize_relays(self):
-        """Ensures all relays are turned off at the start."""
-        print("Initializing all relays to OFF.")
-        for i in range(1, 5):
-            lib4relay.set(0, i, 0)
-            self.relay_hardware_states[i] = 0
-
     def listen(self):
         """This method should be implemented by subclasses."""
         raise NotImplementedError
 
+    def is_valid_relay(self, relay_num):
+        """Returns True if the relay number exists on the stacked boards."""
+        return self.relay_bank.is_valid_relay(relay_num)
+
+    def _set_relays(self, relay_nums, value):
+        """Sets the state of several relays."""
+        self.relay_bank.set_relays(relay_nums, value)
+
+    def _toggle_relays(self, relay_nums):
+        """Toggles the state of several relays."""
+        self.relay_bank.toggle_relays(relay_nums)
+
     def _toggle_relay(self, relay_num):
         """Toggles the state of a relay."""
-        current_state = self.relay_hardware_states[relay_num]
-        new_state = 1 - current_state
-        lib4relay.set(0, relay_num, new_state)
-        self.relay_hardware_states[relay_num] = new_state
-
-    def _update_relays(self, active_relays):
-        """Updates the relays based on the set of active relays."""
-        for relay_num in range(1, 5):
-            current_hw_state = self.relay_hardware_states[relay_num]
-            should_be_on = relay_num in active_relays
-
-            if should_be_on and current_hw_state == 0:
-                lib4relay.set(0, relay_num, 1)
-                self.relay_hardware_states[relay_num] = 1
-            elif not should_be_on and current_hw_state == 1:
-                lib4relay.set(0, relay_num, 0)
-                self.relay_hardware_states[relay_num] = 0
+        self.relay_bank.toggle_relays((relay_num,))
+
+    def _update_relays(self, active_relays, managed_relays):
+        """Updates the managed relays based on the set of active relays."""
+        self.relay_bank.update_relays(active_relays, managed_relays)
+
+    def _managed_relays(self):
+        """Returns the relays this controller drives. Subclasses should override this."""
+        return set()
+
+    def release_relays(self):
+        """Turns off this controller's relays, leaving relays set over the network alone."""
+        self.relay_bank.update_relays(set(), self._managed_relays())
 
     def cleanup(self):
-        """Turns off all relays and closes the device."""
-        print("Turning all relays OFF.")
-        for i in range(1, 5):
-            lib4relay.set(0, i, 0)
+        """Releases this controller's relays and closes the device."""
+        self.release_relays()
         if self.device:
             self.device.close()
             print("Input device closed.")
@@ -20,6 +20,18 @@ class JX05Controller(BaseController):
             return
         self.swipe_map = swipe_map
 
+    def _managed_relays(self):
+        """Returns the valid relays in the swipe map."""
+        relays = set()
+        for relay_key in self.swipe_map:
+            try:
+                relay_num = int(relay_key.split('_')[1])
+            except (ValueError, IndexError):
+                continue
+            if self.is_valid_relay(relay_num):
+                relays.add(relay_num)
+        return relays
+
     def listen(self):
         """Listens for input events and handles device disconnection."""
         try:
@@ -61,13 +73,19 @@ class JX05Controller(BaseController):
             swipe_direction = self._get_swipe_direction(delta_x, delta_y)
 
             if swipe_direction:
+                relays_to_toggle = []
                 for relay_key, directions in self.swipe_map.items():
                     if swipe_direction in directions:
                         try:
                             relay_num = int(relay_key.split('_')[1])
-                            self._toggle_relay(relay_num)
                         except (ValueError, IndexError):
                             print(f"Warning: Invalid relay key format '{relay_key}' in swipe_map. Skipping.")
+                            continue
+                        if not self.is_valid_relay(relay_num):
+                            print(f"Warning: Invalid relay number {relay_num} in swipe_map. Skipping.")
+                            continue
+                        relays_to_toggle.append(relay_num)
+                self._toggle_relays(relays_to_toggle)
 
         # Reset coordinates
         self.touch_start_x = None
@@ -1,6 +1,5 @@
 from .base_controller import BaseController
 from evdev import ecodes
-import lib4relay
 
 class WirelessController(BaseController):
     """Controller class for standard wireless gamepads."""
@@ -21,7 +20,7 @@ class WirelessController(BaseController):
         for relay_key, button_names in keymap.items():
             try:
                 relay_num = int(relay_key.split('_')[1])
-                if not 1 <= relay_num <= 4:
+                if not self.is_valid_relay(relay_num):
                     print(f"Warning: Invalid relay number {relay_num} in keymap. Skipping.")
                     continue
                 
@@ -54,6 +53,10 @@ class WirelessController(BaseController):
         for code in all_codes:
             self.button_states[code] = False
 
+    def _managed_relays(self):
+        """Returns the relays mapped to buttons or the D-pad."""
+        return set(self.relay_to_buttons) | set(self.dpad_to_relay.values())
+
     def listen(self):
         """Listens for input events and handles device disconnection."""
         try:
@@ -66,10 +69,9 @@ class WirelessController(BaseController):
                         relay_num = self.dpad_to_relay[(ecodes.bytype[event.type][event.code], event.value)]
                         self._toggle_relay(relay_num)
                     elif event.value == 0: # D-pad released
-                        for key, relay_num in self.dpad_to_relay.items():
-                            if key[0] == ecodes.bytype[event.type][event.code]:
-                                lib4relay.set(0, relay_num, 0)
-                                self.relay_hardware_states[relay_num] = 0
+                        released_relays = [relay_num for key, relay_num in self.dpad_to_relay.items()
+                                           if key[0] == ecodes.bytype[event.type][event.code]]
+                        self._set_relays(released_relays, 0)
         except (OSError, FileNotFoundError) as e:
             self.is_connected = False
             print(f"Error: Device disconnected or not found: {e}. Retrying in 5 seconds...")
@@ -81,8 +83,12 @@ class WirelessController(BaseController):
         """A generic handler for all button events."""
         if event_code in self.button_states:
             self.button_states[event_code] = pressed
+            # Only relays mapped to this button change, so other relays keep any state set over the network.
+            affected_relays = set()
             active_relays = set()
             for relay_num, codes in self.relay_to_buttons.items():
-                if any(self.button_states.get(c, False) for c in codes):
-                    active_relays.add(relay_num)
-            self._update_relays(active_relays)
+                if event_code in codes:
+                    affected_relays.add(relay_num)
+                    if any(self.button_states.get(c, False) for c in codes):
+                        active_relays.add(relay_num)
+            self._update_relays(active_relays, affected_relays)
@@ -0,0 +1,192 @@
+import threading
+import smbus2 as smbus
+import lib4relay
+
+# Operations for RelayBank.apply_mask(); bit 0 of a mask is relay 1.
+RELAY_OP_SET = 0
+RELAY_OP_ON = 1
+RELAY_OP_OFF = 2
+RELAY_OP_TOGGLE = 3
+
+RELAYS_PER_BOARD = 4
+MAX_RELAY_BOARDS = 8
+I2C_BUS = 1
+# How often open boards are checked for a reset, in seconds.
+BOARD_CHECK_INTERVAL = 1.0
+
+# Output register value for each 4-bit board mask, precomputed from lib4relay's remapping.
+OUTPUT_VALUES = [lib4relay.relayToIO(board_mask) for board_mask in range(1 << RELAYS_PER_BOARD)]
+
+class RelayBank:
+    """Relay state for the stacked relay boards, shared by controllers and network control."""
+
+    def __init__(self, relay_boards=1):
+        if not isinstance(relay_boards, int) or isinstance(relay_boards, bool) \
+           or not 1 <= relay_boards <= MAX_RELAY_BOARDS:
+            print(f"Warning: Invalid relay board count {relay_boards!r}. Using 1.")
+            relay_boards = 1
+        self.relay_count = relay_boards * RELAYS_PER_BOARD
+        # One bitmask per stacked board, keyed by stack level; bit 0 is the board's first relay.
+        self.board_states = {stack: 0 for stack in range(relay_boards)}
+        self.board_addresses = {stack: lib4relay.DEVICE_ADDRESS + (0x07 ^ stack) for stack in self.board_states}
+        self.bus = None
+        # Serializes relay writes between the input device and network control.
+        self.lock = threading.Lock()
+        self.stop_checks = threading.Event()
+        self.check_thread = None
+
+    def open(self):
+        """Opens the I2C bus and ensures all relays are turned off at the start."""
+        print(f"Initializing all relays to OFF on {len(self.board_states)} board(s).")
+        with self.lock:
+            self.bus = smbus.SMBus(I2C_BUS)
+            try:
+                self._turn_all_off()
+                # Outputs are cleared first so the relays never switch on when the pins become outputs.
+                for address in self.board_addresses.values():
+                    self.bus.write_byte_data(address, lib4relay.RELAY4_CFG_REG_ADD, 0)
+            except Exception:
+                # e.g. relay_boards is higher than the number of boards actually stacked.
+                self.bus.close()
+                self.bus = None
+                raise
+        self.stop_checks.clear()
+        self.check_thread = threading.Thread(target=self._check_boards_loop)
+        self.check_thread.daemon = True
+        self.check_thread.start()
+
+    def close(self):
+        """Turns off all relays and closes the I2C bus."""
+        print("Turning all relays OFF.")
+        self.stop_checks.set()
+        if self.check_thread:
+            self.check_thread.join()
+            self.check_thread = None
+        with self.lock:
+            if self.bus:
+                self._turn_all_off()
+                self.bus.close()
+                self.bus = None
+
+    def _turn_all_off(self):
+        """Writes every board's output register to OFF through the open bus. Must hold the lock."""
+        for stack, address in self.board_addresses.items():
+            self.bus.write_byte_data(address, lib4relay.RELAY4_OUTPORT_REG_ADD, OUTPUT_VALUES[0])
+            self.board_states[stack] = 0
+
+    def _check_boards_loop(self):
+        """Runs check_boards() every BOARD_CHECK_INTERVAL seconds until close()."""
+        while not self.stop_checks.wait(BOARD_CHECK_INTERVAL):
+            try:
+                self.check_boards()
+            except OSError as e:
+                print(f"Warning: Could not check relay boards: {e}")
+
+    def check_boards(self):
+        """Restores any board that has reset since it was opened.
+
+        Relay writes go straight to the output register, so unlike lib4relay.check() they
+        do not notice a board that reset (brownout or hot-plug) and whose pins went back to
+        inputs. This re-applies the board's output state and configuration instead; until
+        the next check, writes to a reset board have no effect.
+        """
+        with self.lock:
+            if not self.bus:
+                return
+            for stack, address in self.board_addresses.items():
+                if self.bus.read_byte_data(address, lib4relay.RELAY4_CFG_REG_ADD) != 0:
+                    print(f"Warning: Relay board at stack level {stack} was reset. Restoring its relays.")
+                    self.bus.write_byte_data(address, lib4relay.RELAY4_OUTPORT_REG_ADD,
+                                             OUTPUT_VALUES[self.board_states[stack]])
+                    self.bus.write_byte_data(address, lib4relay.RELAY4_CFG_REG_ADD, 0)
+
+    def is_valid_relay(self, relay_num):
+        """Returns True if the relay number exists on the stacked boards."""
+        return 1 <= relay_num <= self.relay_count
+
+    def _relay_location(self, relay_num):
+        """Returns the stack level and board bitmask for a relay number."""
+        index = relay_num - 1
+        return index // RELAYS_PER_BOARD, 1 << (index % RELAYS_PER_BOARD)
+
+    def _write_board_states(self, new_states):
+        """Writes each changed board with a single I2C write. Must hold the lock.
+
+        The output register is written directly through the bus opened by open(), so a
+        change costs one bus transaction per board instead of lib4relay's open, two reads
+        and a write.
+        """
+        for stack, board_mask in new_states.items():
+            if board_mask != self.board_states[stack]:
+                self.bus.write_byte_data(self.board_addresses[stack], lib4relay.RELAY4_OUTPORT_REG_ADD,
+                                         OUTPUT_VALUES[board_mask])
+                self.board_states[stack] = board_mask
+
+    def set_relays(self, relay_nums, value):
+        """Sets the state of several relays."""
+        with self.lock:
+            new_states = dict(self.board_states)
+            for relay_num in relay_nums:
+                stack, bit = self._relay_location(relay_num)
+                if value:
+                    new_states[stack] |= bit
+                else:
+                    new_states[stack] &= ~bit
+            self._write_board_states(new_states)
+
+    def toggle_relays(self, relay_nums):
+        """Toggles the state of several relays."""
+        with self.lock:
+            new_states = dict(self.board_states)
+            for relay_num in relay_nums:
+                stack, bit = self._relay_location(relay_num)
+                new_states[stack] ^= bit
+            self._write_board_states(new_states)
+
+    def update_relays(self, active_relays, managed_relays):
+        """Updates the managed relays based on the set of active relays.
+
+        Relays outside managed_relays keep their current state.
+        """
+        with self.lock:
+            new_states = dict(self.board_states)
+            for relay_num in managed_relays:
+                stack, bit = self._relay_location(relay_num)
+                if relay_num in active_relays:
+                    new_states[stack] |= bit
+                else:
+                    new_states[stack] &= ~bit
+            self._write_board_states(new_states)
+
+    def get_mask(self):
+        """Returns the relay states as a bitmask (bit 0 = relay 1)."""
+        mask = 0
+        for stack, board_mask in self.board_states.items():
+            mask |= board_mask << (stack * RELAYS_PER_BOARD)
+        return mask
+
+    def apply_mask(self, op, mask):
+        """Applies a relay bitmask operation and returns the resulting mask.
+
+        Each board with changed relays is written with a single I2C write.
+        """
+        with self.lock:
+            current_mask = self.get_mask()
+            if op == RELAY_OP_SET:
+                new_mask = mask
+            elif op == RELAY_OP_ON:
+                new_mask = current_mask | mask
+            elif op == RELAY_OP_OFF:
+                new_mask = current_mask & ~mask
+            elif op == RELAY_OP_TOGGLE:
+                new_mask = current_mask ^ mask
+            else:
+                raise ValueError(f"Invalid relay operation {op}")
+            new_mask &= (1 << self.relay_count) - 1
+
+            board_bits = (1 << RELAYS_PER_BOARD) - 1
+            self._write_board_states({
+                stack: (new_mask >> (stack * RELAYS_PER_BOARD)) & board_bits
+                for stack in self.board_states
+            })
+            return new_mask
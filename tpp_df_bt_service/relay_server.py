@@ -0,0 +1,187 @@
+"""
+Network Relay Control
+
+A compact datagram protocol for driving the relays from the LAN. Each command is a
+single 12-byte packet (network byte order):
+
+    magic    2 bytes   b"TR"
+    version  1 byte    1
+    op       1 byte    low nibble: 0 = SET, 1 = ON, 2 = OFF, 3 = TOGGLE
+                       0x40: reply with the resulting relay mask
+                       0x80: resync the sequence number for this sender
+    seq      4 bytes   sequence number, incremented by the sender for every command
+    mask     4 bytes   relay bitmask, bit 0 = relay 1
+
+Commands whose sequence number is not newer than the last one accepted from the same
+sender are dropped as stale or duplicate. The most recent MAX_SENDERS senders are
+tracked; a sender that has been forgotten is treated as new. Replies reuse the same layout, with the
+command's op and seq and the resulting relay mask.
+"""
+
+import os
+import socket
+import stat
+import struct
+import threading
+
+from .relay_bank import RELAY_OP_SET, RELAY_OP_TOGGLE
+
+PACKET = struct.Struct("!2sBBII")
+MAGIC = b"TR"
+VERSION = 1
+
+OP_MASK = 0x0F
+FLAG_REPLY = 0x40
+FLAG_RESYNC = 0x80
+
+# Larger than PACKET so oversized datagrams arrive untruncated and fail the length check.
+RECV_SIZE = 64
+
+MAX_SENDERS = 256
+
+DEFAULT_SOCKET_MODE = 0o660
+
+SEQ_MODULUS = 1 << 32
+SEQ_HALF = 1 << 31
+
+server = None
+
+
+class RelayCommandServer:
+    """Receives relay commands over UDP or a Unix datagram socket."""
+
+    def __init__(self, sock, relay_bank, socket_path=None):
+        self.sock = sock
+        self.socket_path = socket_path
+        self.relay_bank = relay_bank
+        self.last_seq = {}
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        """Starts the receive loop in a new thread."""
+        self.running = True
+        self.thread = threading.Thread(target=self.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def serve_forever(self):
+        """Receives and handles packets until the server is stopped."""
+        recvfrom = self.sock.recvfrom
+        while self.running:
+            try:
+                data, addr = recvfrom(RECV_SIZE)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            reply = self.handle_packet(data, addr)
+            if reply is not None and addr:
+                try:
+                    self.sock.sendto(reply, addr)
+                except OSError:
+                    pass
+
+    def handle_packet(self, data, addr):
+        """Applies a single command packet and returns the reply, if one was requested."""
+        if len(data) != PACKET.size:
+            return None
+        magic, version, op, seq, mask = PACKET.unpack(data)
+        if magic != MAGIC or version != VERSION:
+            return None
+        relay_op = op & OP_MASK
+        if relay_op < RELAY_OP_SET or relay_op > RELAY_OP_TOGGLE:
+            return None
+
+        if not op & FLAG_RESYNC:
+            last = self.last_seq.get(addr)
+            if last is not None and not 0 < (seq - last) % SEQ_MODULUS < SEQ_HALF:
+                return None
+
+        try:
+            result = self.relay_bank.apply_mask(relay_op, mask)
+        except (OSError, ValueError) as e:
+            print(f"Error applying network relay command: {e}")
+            return None
+        # Only applied commands use up their sequence number, so a failed command can be retried.
+        last_seq = self.last_seq
+        last_seq.pop(addr, None)
+        last_seq[addr] = seq
+        if len(last_seq) > MAX_SENDERS:
+            del last_seq[next(iter(last_seq))]
+
+        if op & FLAG_REPLY:
+            return PACKET.pack(MAGIC, VERSION, op, seq, result)
+        return None
+
+    def shutdown(self):
+        """Stops the receive loop, closes the socket and removes its path."""
+        self.running = False
+        if self.thread:
+            self.thread.join()
+        self.sock.close()
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def _socket_mode(network_config):
+    """Returns the Unix socket mode from an octal string such as "0660" or an integer."""
+    socket_mode = network_config.get("socket_mode", DEFAULT_SOCKET_MODE)
+    try:
+        if isinstance(socket_mode, str):
+            socket_mode = int(socket_mode, 8)
+        if isinstance(socket_mode, int) and not isinstance(socket_mode, bool) and 0 <= socket_mode <= 0o777:
+            return socket_mode
+    except ValueError:
+        pass
+    # The service runs as root; only the owner and group may send commands by default.
+    print(f"Warning: Invalid socket_mode {socket_mode!r}. Using 0660.")
+    return DEFAULT_SOCKET_MODE
+
+
+def start_relay_server(network_config, relay_bank):
+    """Opens the configured socket and starts the relay command server."""
+    global server
+    socket_path = network_config.get("socket_path")
+    if socket_path:
+        if os.path.exists(socket_path):
+            if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                raise FileExistsError(f"{socket_path} exists and is not a socket")
+            os.unlink(socket_path)
+        socket_dir = os.path.dirname(socket_path)
+        if socket_dir:
+            os.makedirs(socket_dir, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    else:
+        host = network_config.get("host", "0.0.0.0")
+        port = network_config.get("port", 5005)
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    try:
+        if socket_path:
+            sock.bind(socket_path)
+            os.chmod(socket_path, _socket_mode(network_config))
+            print(f"Listening for relay commands on {socket_path}")
+        else:
+            sock.bind((host, port))
+            print(f"Listening for relay commands on udp://{host}:{port}")
+        # Only bounds how long shutdown() waits; packets are handled as soon as they arrive.
+        sock.settimeout(0.5)
+    except Exception:
+        sock.close()
+        if socket_path and os.path.exists(socket_path):
+            os.unlink(socket_path)
+        raise
+
+    server = RelayCommandServer(sock, relay_bank, socket_path)
+    server.start()
+    return server
+
+
+def cleanup_relay_server():
+    """Stops the relay command server, if one was started."""
+    global server
+    if server:
+        print("Cleaning up relay command server.")
+        server.shutdown()
+        server = None
@@ -1,4 +1,5 @@
 import json
+import signal
 import sys
 import re
 import time
@@ -6,6 +7,8 @@ import traceback
 import pydbus
 from evdev import InputDevice, list_devices
 import importlib
+from . import relay_server
+from .relay_bank import RelayBank
 
 def find_controller_device(allowed_devices):
     """Scans for a suitable controller device using pydbus and evdev."""
@@ -43,37 +46,64 @@ def get_controller_class(controller_name):
 
 def main():
     """Main function to run the controller service."""
-    while True:
-        try:
-            with open("/etc/tpp-df-bt-service/config.json", "r") as f:
-                config = json.load(f)
-            allowed_devices = config.get("allowed_devices", [])
+    # systemd stops the service with SIGTERM; exit through the cleanup below.
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    relay_bank = None
+    try:
+        while True:
+            try:
+                with open("/etc/tpp-df-bt-service/config.json", "r") as f:
+                    config = json.load(f)
+                allowed_devices = config.get("allowed_devices", [])
+
+                # The relays outlive any one controller so network commands work without one.
+                if relay_bank is None:
+                    bank = RelayBank(config.get("relay_boards", 1))
+                    bank.open()
+                    relay_bank = bank
+
+                network_config = config.get("network_control")
+                if network_config and not relay_server.server:
+                    # Network control is optional; a failure here must not stop the controller.
+                    try:
+                        relay_server.start_relay_server(network_config, relay_bank)
+                    except Exception as e:
+                        print(f"Warning: Could not start network relay control: {e}")
 
-            device_path, device_name, device_mac, device_config = find_controller_device(allowed_devices)
+                device_path, device_name, device_mac, device_config = find_controller_device(allowed_devices)
 
-            if device_path:
-                controller_name = device_config.get("controller")
-                if controller_name:
-                    ControllerClass = get_controller_class(controller_name)
-                    if ControllerClass:
-                        controller = ControllerClass(
-                            device_path=device_path,
-                            device_name=device_name,
-                            device_mac=device_mac
-                        )
-                        controller.setup(device_config)
-                        controller.listen()
+                if device_path:
+                    controller_name = device_config.get("controller")
+                    if controller_name:
+                        ControllerClass = get_controller_class(controller_name)
+                        if ControllerClass:
+                            controller = ControllerClass(
+                                device_path=device_path,
+                                device_name=device_name,
+                                device_mac=device_mac,
+                                relay_bank=relay_bank
+                            )
+                            controller.setup(device_config)
+                            try:
+                                controller.listen()
+                            finally:
+                                # Held relays would otherwise stay on after the device drops.
+                                controller.release_relays()
+                    else:
+                        print("Error: Controller not defined for the device in config.json")
                 else:
-                    print("Error: Controller not defined for the device in config.json")
-            else:
-                print("No connected controller found. Retrying in 10 seconds...")
-                time.sleep(10)
+                    print("No connected controller found. Retrying in 10 seconds...")
+                    time.sleep(10)
 
-        except Exception as e:
-            print(f"An unexpected error occurred in the main loop: {e}")
-            traceback.print_exc()
-            print("Retrying in 10 seconds...")
-            time.sleep(10)
+            except Exception as e:
+                print(f"An unexpected error occurred in the main loop: {e}")
+                traceback.print_exc()
+                print("Retrying in 10 seconds...")
+                time.sleep(10)
+    finally:
+        relay_server.cleanup_relay_server()
+        if relay_bank:
+            relay_bank.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file